@@ -44,6 +44,7 @@ class ApplicationBuilder(abstract_builder.ApplicationBuilder):
     def __init__(self, process_id: int) -> None:
         super().__init__(process_id)
         self._prior_component = None
+        self._posterior_component = None
 
     # ----------------------------------------------------------------------------------------------
     def set_up_models(self, inverse_problem_settings: InverseProblemSettings) -> list[Callable]:
@@ -78,6 +79,7 @@ class ApplicationBuilder(abstract_builder.ApplicationBuilder):
         )
 
         model_wrapper = posterior.LogPosterior(prior_component, likelihood_component)
+        self._posterior_component = model_wrapper
         models = [
             partial(model_wrapper, config=config)
             for config in inverse_problem_settings.ub_model_configs
@@ -109,3 +111,7 @@ class ApplicationBuilder(abstract_builder.ApplicationBuilder):
     def generate_initial_state(self, _initial_state_settings: InitialStateSettings) -> np.ndarray:
         initial_state = self._prior_component.sample()
         return initial_state
+
+    # ----------------------------------------------------------------------------------------------
+    def get_cached_components(self) -> list[Any]:
+        return [self._posterior_component]
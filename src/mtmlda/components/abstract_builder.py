@@ -15,6 +15,7 @@ Classes:
 from abc import ABC, abstractmethod
 from collections.abc import Callable
 from dataclasses import dataclass
+from typing import Any
 
 import numpy as np
 
@@ -50,6 +51,7 @@ class ApplicationBuilder(ABC):
         set_up_models: Set up a model hierarchy in the form of a list of callables..
         set_up_sampler_components: Set up proposal and accept rate estimator.
         generate_initial_state: Generate the initial state for the Markov chain
+        get_cached_components: Return model components with evaluation caches
     """
 
     def __init__(self, process_id: int) -> None:
@@ -110,3 +112,15 @@ class ApplicationBuilder(ABC):
             np.ndarray: Initial state
         """
         raise NotImplementedError
+
+    def get_cached_components(self) -> list[Any]:
+        """Return model components with evaluation caches, to persist them between runs.
+
+        Components need to provide the methods `get_cache_entries` and `set_cache_entries`, like
+        the `LogPosterior` wrapper. The method can be overwritten optionally, per default no
+        components are returned.
+
+        Returns:
+            list[Any]: Model components with evaluation caches
+        """
+        return []
@@ -4,14 +4,115 @@ This module provides different components that can be combined into a log-poster
 them mimics the UM-Bridge interface.
 
 Classes:
+    LRUCache: Thread-safe least-recently-used cache for log-density evaluations
     GaussianLLFromPTOMap: Gaussian log-likelihood from parameter-to-observable map
     LogPosterior: Wrapper for combining log-prior and log-likelihood into a log-posterior
 """
 
+import functools
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
 from typing import Any
 
 import numpy as np
 import umbridge as ub
+from scipy import linalg
+from scipy.linalg import blas
+
+from . import prior
+
+
+# ==================================================================================================
+class LRUCache:
+    """Thread-safe least-recently-used cache for log-density evaluations.
+
+    The cache maps hashable keys to float values. If the maximum size is exceeded, the least
+    recently used entry is evicted. Since the MTMLDA job handler evaluates models concurrently from
+    multiple threads, all accesses to the internal storage are guarded by a lock.
+
+    Methods:
+        get: Retrieve a value from the cache, returns None if the key is not present
+        put: Insert a value into the cache
+        export_entries: Return a copy of all stored entries
+        import_entries: Insert a collection of entries into the cache
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """Constructor.
+
+        Args:
+            maxsize (int): Maximum number of stored entries, a size of zero disables the cache.
+                Default is 1024.
+
+        Raises:
+            ValueError: Checks that the maximum size is non-negative
+        """
+        if maxsize < 0:
+            raise ValueError("The maximum cache size must be non-negative.")
+        self._maxsize = maxsize
+        self._storage = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ----------------------------------------------------------------------------------------------
+    def get(self, key: Hashable) -> float | None:
+        """Retrieve a value from the cache, marking it as most recently used.
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            float | None: Cached value, None if the key is not present
+        """
+        with self._lock:
+            value = self._storage.get(key)
+            if value is not None:
+                self._storage.move_to_end(key)
+        return value
+
+    # ----------------------------------------------------------------------------------------------
+    def put(self, key: Hashable, value: float) -> None:
+        """Insert a value into the cache, evicting the least recently used entry if necessary.
+
+        Args:
+            key (Hashable): Cache key
+            value (float): Value to store
+        """
+        if self._maxsize == 0:
+            return
+        with self._lock:
+            self._storage[key] = value
+            self._storage.move_to_end(key)
+            if len(self._storage) > self._maxsize:
+                self._storage.popitem(last=False)
+
+    # ----------------------------------------------------------------------------------------------
+    def export_entries(self) -> dict[Hashable, float]:
+        """Return a copy of all stored entries, ordered from least to most recently used."""
+        with self._lock:
+            entries = dict(self._storage)
+        return entries
+
+    # ----------------------------------------------------------------------------------------------
+    def import_entries(self, entries: dict[Hashable, float]) -> None:
+        """Insert a collection of entries into the cache, in the order they are provided.
+
+        Args:
+            entries (dict[Hashable, float]): Entries to insert
+        """
+        for key, value in entries.items():
+            self.put(key, value)
+
+    # ----------------------------------------------------------------------------------------------
+    @property
+    def maxsize(self) -> int:
+        """Maximum number of stored entries."""
+        return self._maxsize
+
+    # ----------------------------------------------------------------------------------------------
+    def __len__(self) -> int:
+        """Return the number of stored entries."""
+        return len(self._storage)
 
 
 # ==================================================================================================
@@ -23,6 +124,8 @@ class GaussianLLFromPTOMap:
 
     Methods:
         __call__: UM-Bridge-like call interface for the log-likelihood.
+        call_batch: Evaluate the log-likelihood for a batch of parameter candidates.
+        precision: Precision matrix of the likelihood, computed on demand.
     """
 
     def __init__(
@@ -30,6 +133,11 @@ class GaussianLLFromPTOMap:
     ) -> None:
         """Constructor.
 
+        The covariance matrix is validated and factorized once. Depending on its structure, the
+        routine for computing the weighted misfit norm is selected here, instead of on every call.
+        If the covariance matrix is diagonal, the misfit is simply weighted with the inverse
+        variances in all subsequent evaluations.
+
         Args:
             umbridge_pto_map (ub.Model): UM-Bridge-server resembling the
                 parameter-to-observable map.
@@ -41,6 +149,7 @@ class GaussianLLFromPTOMap:
         Raises:
             ValueError: Checks if the sizes of the data vector and the output of the PTO map match
             ValueError: Checks if the covariance matrix has the same shape as the data vector
+            ValueError: Checks if the covariance matrix is symmetric positive definite
         """
         if not umbridge_pto_map.get_output_sizes()[0] == data.size:
             raise ValueError(
@@ -50,14 +159,35 @@ class GaussianLLFromPTOMap:
         if not covariance.shape == (data.size, data.size):
             raise ValueError("The covariance matrix must have the same shape as the data vector.")
 
+        if not (np.all(np.isfinite(covariance)) and np.allclose(covariance, covariance.T)):
+            raise ValueError("The covariance matrix must be finite and symmetric.")
+        try:
+            cholesky_factor = linalg.cholesky(covariance, lower=True, check_finite=False)
+        except linalg.LinAlgError as exc:
+            raise ValueError("The covariance matrix must be positive definite.") from exc
+
         self._umbridge_pto_map = umbridge_pto_map
         self._data = data
-        self._precision = np.linalg.inv(covariance)
+        self._cholesky_factor = np.asfortranarray(cholesky_factor)
+        self._covariance_is_diagonal = (
+            np.count_nonzero(covariance - np.diag(np.diag(covariance))) == 0
+        )
+        self._inverse_variances = 1 / np.diag(covariance)
+        if self._covariance_is_diagonal:
+            self._weighted_squared_norm = self._diagonal_weighted_squared_norm
+        else:
+            self._weighted_squared_norm = self._cholesky_weighted_squared_norm
 
     def __call__(self, parameter: list[list[float]], config: dict[Any]) -> list[list[float]]:
         """UMbridge-like call interface for log-likelihood.
 
         Note that input- and output-formats of this method resemble exactly those in UM-Bridge.
+        The quadratic form of the misfit is computed as the squared norm of the misfit, whitened
+        with the lower Cholesky factor of the covariance matrix. The triangular solve directly
+        invokes the BLAS routine, avoiding the considerable call overhead of the high-level SciPy
+        interface for small observable vectors. For diagonal covariance matrices, the squared
+        misfit is simply weighted with the inverse variances. The PTO output is converted into a
+        single array, which is subsequently overwritten by the misfit and its transformations.
 
         Args:
             parameter (list[list[float]]): Parameter candidate
@@ -66,26 +196,124 @@ class GaussianLLFromPTOMap:
         Returns:
             list[list[float]]: Log-likelihood value
         """
-        observables = np.array(self._umbridge_pto_map(parameter, config)[0])
-        misfit = self._data - observables
-        log_likelihood = -0.5 * misfit.T @ self._precision @ misfit
+        observables = np.fromiter(
+            self._umbridge_pto_map(parameter, config)[0], dtype=np.float64, count=self._data.size
+        )
+        misfit = np.subtract(self._data, observables, out=observables)
+        log_likelihood = -0.5 * self._weighted_squared_norm(misfit)
         return [[log_likelihood]]
 
+    def call_batch(self, parameters: np.ndarray, config: dict[Any]) -> np.ndarray:
+        """Evaluate the log-likelihood for a batch of parameter candidates.
+
+        The PTO map is queried for every candidate, but the misfits of all candidates are whitened
+        in a single triangular solve with multiple right-hand sides, and reduced jointly.
+        This is a user-facing API, e.g. for post-processing of chains, the MTMLDA sampler only
+        utilizes the UM-Bridge call interface.
+
+        Args:
+            parameters (np.ndarray): Parameter candidates, array of shape (N, d)
+            config (dict[str, Any]): Configuration dictionary to be passed on to UM-Bridge server
+
+        Returns:
+            np.ndarray: Log-likelihood values, array of shape (N,)
+        """
+        parameters = np.atleast_2d(parameters)
+        observables = np.array(
+            [self._umbridge_pto_map([parameter.tolist()], config)[0] for parameter in parameters]
+        )
+        misfits = self._data - observables
+        if self._covariance_is_diagonal:
+            log_likelihoods = -0.5 * (np.square(misfits) @ self._inverse_variances)
+        else:
+            whitened_misfits = linalg.solve_triangular(
+                self._cholesky_factor, misfits.T, lower=True, overwrite_b=True, check_finite=False
+            )
+            log_likelihoods = -0.5 * np.sum(np.square(whitened_misfits), axis=0)
+        return log_likelihoods
+
+    def _diagonal_weighted_squared_norm(self, misfit: np.ndarray) -> float:
+        """Squared misfit norm for diagonal covariance matrices, overwrites the misfit."""
+        squared_misfit = np.square(misfit, out=misfit)
+        return np.dot(squared_misfit, self._inverse_variances)
+
+    def _cholesky_weighted_squared_norm(self, misfit: np.ndarray) -> float:
+        """Squared misfit norm for dense covariance matrices, overwrites the misfit."""
+        whitened_misfit = blas.dtrsv(self._cholesky_factor, misfit, lower=1, overwrite_x=1)
+        return np.dot(whitened_misfit, whitened_misfit)
+
+    @functools.cached_property
+    def precision(self) -> np.ndarray:
+        """Precision matrix of the likelihood, computed from the Cholesky factor on first access."""
+        identity = np.identity(self._data.size)
+        return linalg.cho_solve((self._cholesky_factor, True), identity, check_finite=False)
+
 
 # ==================================================================================================
 class LogPosterior:
-    def __init__(self, log_prior: Any, log_likelihood: Any) -> None:
+    def __init__(  # noqa: PLR0913
+        self,
+        log_prior: Any,
+        log_likelihood: Any,
+        *,
+        cache_size: int = 1024,
+        support_check: Callable[[list[list[float]]], bool] | None = None,
+        level: int | None = None,
+        share_caches_with: "LogPosterior | None" = None,
+    ) -> None:
         """Wrapper for computing the log posterior from a log-likelihood and a log-prior component.
 
         log-likelihood and log-prior can be anything, but need to be callable according to the
-        UM-Bridge call interface.
+        UM-Bridge call interface. Evaluations of both components are memoized in separate LRU
+        caches, as identical parameter candidates are frequently revisited within the Markov tree.
+        The caches are owned by the instance, so they are not shared between parallel chains.
+        If separate wrappers are set up for the different levels of a model hierarchy, they can
+        share their caches with each other. In this case, log-likelihood values are distinguished
+        by the level of the wrapper, which therefore has to be provided and has to differ from the
+        levels of all other wrappers sharing the caches. All sharing wrappers need to utilize the
+        same log-prior.
+        Optionally, a cheap predicate for the support of the prior can be provided, which is
+        checked before any density evaluation.
 
         Args:
             log_prior (Any): Log-prior component
             log_likelihood (Any): Log-likelihood component
+            cache_size (int): Maximum number of cached evaluations per component, zero disables
+                caching, including the memorization of the most recent evaluation. Ignored if
+                caches are shared with another wrapper. Default is 1024.
+            support_check (Callable[[list[list[float]]], bool] | None): Predicate indicating if
+                a parameter candidate (in UM-Bridge format) lies in the support of the prior.
+                Default is None, meaning that the support is determined by the log-prior value.
+            level (int | None): Level of the wrapper in the model hierarchy, used to distinguish
+                log-likelihood values in shared caches. Default is None.
+            share_caches_with (LogPosterior | None): Wrapper to share the caches with, default is
+                None, meaning that the wrapper creates its own caches.
+
+        Raises:
+            ValueError: Checks that a level is provided if caches are shared
+            ValueError: Checks that the level differs from those of all wrappers sharing the caches
         """
+        if share_caches_with is not None:
+            if level is None:
+                raise ValueError("A level has to be provided to share caches between wrappers.")
+            if level in share_caches_with._cache_levels:  # noqa: SLF001
+                raise ValueError(f"Caches are already shared with a wrapper of level {level}.")
         self._log_prior = log_prior
         self._log_likelihood = log_likelihood
+        self._support_check = support_check
+        self._last_support_result = (None, None)
+        self._last_evaluation = (None, None)
+        self._level = level
+        if share_caches_with is None:
+            self._log_prior_cache = LRUCache(cache_size)
+            self._log_likelihood_cache = LRUCache(cache_size)
+            self._cache_levels = {level}
+        else:
+            self._log_prior_cache = share_caches_with._log_prior_cache  # noqa: SLF001
+            self._log_likelihood_cache = share_caches_with._log_likelihood_cache  # noqa: SLF001
+            self._cache_levels = share_caches_with._cache_levels  # noqa: SLF001
+            self._cache_levels.add(level)
+        self._memorize_last_evaluation = self._log_likelihood_cache.maxsize > 0
 
     def __call__(
         self, parameter: list[list[float]], **log_likelihood_args: dict[Any]
@@ -96,7 +324,12 @@ class LogPosterior:
         Note that input- and output-formats of this method resemble exactly those in UM-Bridge.
         If the log-prior evaluates to -inf, meaning it doesn't have support for the current
         parameter candidate, likelihood evaluation is not conducted, and -inf returned immediately
-        for the log-posterior.
+        for the log-posterior. The same holds if a support check is provided and fails, in which
+        case not even the log-prior is evaluated. Previously computed log-prior and log-likelihood
+        values are taken from the caches, where the log-likelihood values are additionally
+        distinguished by the provided keyword arguments. In front of the caches, the most recent
+        evaluation is memorized, to catch immediately repeated calls at minimal overhead. This is
+        skipped if caching is disabled.
 
         Args:
             parameter (list[list[float]]): Parameter candidate
@@ -104,11 +337,185 @@ class LogPosterior:
         Returns:
             list[list[float]]: Log-posterior value
         """
-        log_prior = self._log_prior(parameter)
-        if np.isneginf(log_prior[0][0]):
-            log_posterior = log_prior
+        parameter_arrays = [np.asarray(vector, dtype=np.float64) for vector in parameter]
+        parameter_key = tuple(array.tobytes() for array in parameter_arrays)
+        arguments_key = _make_hashable(log_likelihood_args)
+        if self._memorize_last_evaluation:
+            last_key, last_log_posterior = self._last_evaluation
+            if last_key == (parameter_key, arguments_key):
+                return [[last_log_posterior]]
+
+        if not self._has_support(parameter, parameter_key):
+            log_posterior = -np.inf
         else:
-            log_likelihood = self._log_likelihood(parameter, **log_likelihood_args)
-            log_posterior = [[log_likelihood[0][0] + log_prior[0][0]]]
+            log_prior = self._evaluate_log_prior(parameter, parameter_arrays, parameter_key)
+            if np.isneginf(log_prior):
+                log_posterior = log_prior
+            else:
+                log_likelihood = self._evaluate_log_likelihood(
+                    parameter, parameter_key, arguments_key, **log_likelihood_args
+                )
+                log_posterior = log_likelihood + log_prior
+
+        if self._memorize_last_evaluation:
+            self._last_evaluation = ((parameter_key, arguments_key), log_posterior)
+        return [[log_posterior]]
+
+    # ----------------------------------------------------------------------------------------------
+    def call_batch(self, parameters: np.ndarray, **log_likelihood_args: dict[Any]) -> np.ndarray:
+        """Evaluate the log-posterior for a batch of parameter candidates.
+
+        Both components need to provide a `call_batch` method as well. If a support check is
+        provided, the log-prior is only evaluated for the candidates that pass it. The
+        log-likelihood is only evaluated for the candidates with finite log-prior values, all other
+        candidates are assigned -inf. Note that the batched evaluation bypasses the caches.
+        This is a user-facing API, e.g. for post-processing of chains, the MTMLDA sampler only
+        utilizes the UM-Bridge call interface.
+
+        Args:
+            parameters (np.ndarray): Parameter candidates, array of shape (N, d)
+            **log_likelihood_args (dict[Any]): Keyword arguments passed on to the log-likelihood
+
+        Returns:
+            np.ndarray: Log-posterior values, array of shape (N,)
+        """
+        parameters = np.atleast_2d(parameters)
+        log_posteriors = np.full(parameters.shape[0], -np.inf)
+        if self._support_check is None:
+            has_support = np.ones(parameters.shape[0], dtype=bool)
+        else:
+            has_support = np.array(
+                [bool(self._support_check([parameter.tolist()])) for parameter in parameters],
+                dtype=bool,
+            )
+        if not np.any(has_support):
+            return log_posteriors
+
+        log_priors = np.full(parameters.shape[0], -np.inf)
+        log_priors[has_support] = self._log_prior.call_batch(parameters[has_support])
+        has_support &= np.isfinite(log_priors)
+        if np.any(has_support):
+            log_likelihoods = self._log_likelihood.call_batch(
+                parameters[has_support], **log_likelihood_args
+            )
+            log_posteriors[has_support] = log_likelihoods + log_priors[has_support]
+
+        return log_posteriors
+
+    # ----------------------------------------------------------------------------------------------
+    def get_cache_entries(self) -> dict[str, dict[Hashable, float]]:
+        """Return the entries of the log-prior and log-likelihood caches, e.g. for saving to disk.
+
+        Returns:
+            dict[str, dict[Hashable, float]]: Cache entries for log-prior and log-likelihood
+        """
+        cache_entries = {
+            "log_prior": self._log_prior_cache.export_entries(),
+            "log_likelihood": self._log_likelihood_cache.export_entries(),
+        }
+        return cache_entries
+
+    # ----------------------------------------------------------------------------------------------
+    def set_cache_entries(self, cache_entries: dict[str, dict[Hashable, float]]) -> None:
+        """Fill the log-prior and log-likelihood caches, e.g. with entries from a previous run.
+
+        Args:
+            cache_entries (dict[str, dict[Hashable, float]]): Cache entries, as returned by
+                `get_cache_entries`
+        """
+        self._log_prior_cache.import_entries(cache_entries["log_prior"])
+        self._log_likelihood_cache.import_entries(cache_entries["log_likelihood"])
+
+    # ----------------------------------------------------------------------------------------------
+    def _has_support(self, parameter: list[list[float]], parameter_key: tuple[bytes, ...]) -> bool:
+        """Check if a parameter candidate lies in the support of the prior.
 
-        return log_posterior
+        The result for the most recent parameter candidate is memorized, as the same candidate is
+        typically evaluated on multiple levels of the model hierarchy in succession.
+
+        Args:
+            parameter (list[list[float]]): Parameter candidate
+            parameter_key (tuple[bytes, ...]): Byte representation of all input vectors of the
+                parameter candidate
+
+        Returns:
+            bool: True if the candidate lies in the support, or if no support check is provided
+        """
+        if self._support_check is None:
+            return True
+        last_key, last_result = self._last_support_result
+        if last_key == parameter_key:
+            return last_result
+        has_support = bool(self._support_check(parameter))
+        self._last_support_result = (parameter_key, has_support)
+        return has_support
+
+    # ----------------------------------------------------------------------------------------------
+    def _evaluate_log_prior(
+        self,
+        parameter: list[list[float]],
+        parameter_arrays: list[np.ndarray],
+        parameter_key: tuple[bytes, ...],
+    ) -> float:
+        """Evaluate the log-prior, using the cache if possible.
+
+        Prior components of the MTMLDA library are evaluated directly with the parameter array,
+        avoiding another conversion from the UM-Bridge format. This requires the parameter to
+        consist of a single input vector. All other components are called through the UM-Bridge
+        interface.
+
+        Args:
+            parameter (list[list[float]]): Parameter candidate
+            parameter_arrays (list[np.ndarray]): Input vectors of the parameter candidate,
+                converted to arrays
+            parameter_key (tuple[bytes, ...]): Byte representation of all input vectors of the
+                parameter candidate
+
+        Returns:
+            float: Log-prior value
+        """
+        log_prior = self._log_prior_cache.get(parameter_key)
+        if log_prior is None:
+            if isinstance(self._log_prior, prior.BaseLogPrior) and len(parameter_arrays) == 1:
+                log_prior = float(self._log_prior.evaluate(parameter_arrays[0]))
+            else:
+                log_prior = float(self._log_prior(parameter)[0][0])
+            self._log_prior_cache.put(parameter_key, log_prior)
+        return log_prior
+
+    # ----------------------------------------------------------------------------------------------
+    def _evaluate_log_likelihood(
+        self,
+        parameter: list[list[float]],
+        parameter_key: tuple[bytes, ...],
+        arguments_key: Hashable,
+        **log_likelihood_args: dict[Any],
+    ) -> float:
+        """Evaluate the log-likelihood, using the cache if possible.
+
+        Args:
+            parameter (list[list[float]]): Parameter candidate
+            parameter_key (tuple[bytes, ...]): Byte representation of all input vectors of the
+                parameter candidate
+            arguments_key (Hashable): Hashable representation of the log-likelihood arguments
+            **log_likelihood_args (dict[Any]): Keyword arguments passed on to the log-likelihood
+
+        Returns:
+            float: Log-likelihood value
+        """
+        cache_key = (self._level, parameter_key, arguments_key)
+        log_likelihood = self._log_likelihood_cache.get(cache_key)
+        if log_likelihood is None:
+            log_likelihood = float(self._log_likelihood(parameter, **log_likelihood_args)[0][0])
+            self._log_likelihood_cache.put(cache_key, log_likelihood)
+        return log_likelihood
+
+
+# ==================================================================================================
+def _make_hashable(obj: object) -> Hashable:
+    """Recursively convert (nested) dictionaries and lists into hashable objects for cache keys."""
+    if isinstance(obj, dict):
+        return frozenset((key, _make_hashable(value)) for key, value in obj.items())
+    if isinstance(obj, list | tuple):
+        return tuple(_make_hashable(value) for value in obj)
+    return obj
@@ -25,6 +25,7 @@ class BaseLogPrior(ABC):
 
     Methods:
         __call__: UM-Bridge-like call interface for the log-prior
+        call_batch: Evaluate the log-probability for a batch of parameter vectors
         evaluate: Evaluate the log-probability for a given parameter vector
         sample: Draw a sample from the prior
     """
@@ -53,6 +54,21 @@ class BaseLogPrior(ABC):
         parameter = np.array(parameter[0])
         return [[self.evaluate(parameter)]]
 
+    def call_batch(self, parameters: np.ndarray) -> np.ndarray:
+        """Evaluate the log-probability for a batch of parameter vectors.
+
+        The default implementation simply loops over the `evaluate` method. Subclasses can
+        overwrite this method with a vectorized implementation.
+
+        Args:
+            parameters (np.ndarray): Parameter candidates, array of shape (N, d)
+
+        Returns:
+            np.ndarray: Log-probability values, array of shape (N,)
+        """
+        parameters = np.atleast_2d(parameters)
+        return np.array([self.evaluate(parameter) for parameter in parameters], dtype=np.float64)
+
     @abstractmethod
     def evaluate(self, parameter: np.ndarray) -> float:
         """Compute log-probability for given parameter."""
@@ -104,6 +120,26 @@ class UniformLogPrior(BaseLogPrior):
         else:
             return -np.inf
 
+    def call_batch(self, parameters: np.ndarray) -> np.ndarray:
+        """Evaluate the log-probability for a batch of parameter vectors, vectorized.
+
+        Args:
+            parameters (np.ndarray): Parameter candidates, array of shape (N, d)
+
+        Raises:
+            ValueError: Checks for valid parameter dimension
+
+        Returns:
+            np.ndarray: Log-probability values, array of shape (N,)
+        """
+        parameters = np.atleast_2d(parameters)
+        if not parameters.shape[1] == self._interval_lengths.size:
+            raise ValueError(f"Invalid parameter dimension {parameters.shape[1]}")
+
+        in_bounds = (parameters >= self._lower_bounds) & (parameters <= self._upper_bounds)
+        has_support = in_bounds.all(axis=1)
+        return np.where(has_support, 0.0, -np.inf)
+
     def sample(self) -> np.ndarray:
         """Draw a sample from the prior."""
         sample = self._rng.uniform(self._lower_bounds, self._upper_bounds)
@@ -148,6 +184,28 @@ class GaussianLogPrior(BaseLogPrior):
         log_probability = -0.5 * parameter_diff.T @ self._precision @ parameter_diff
         return log_probability
 
+    def call_batch(self, parameters: np.ndarray) -> np.ndarray:
+        """Evaluate the log-probability for a batch of parameter vectors, vectorized.
+
+        Args:
+            parameters (np.ndarray): Parameter candidates, array of shape (N, d)
+
+        Raises:
+            ValueError: Checks for valid parameter dimension
+
+        Returns:
+            np.ndarray: Log-probability values, array of shape (N,)
+        """
+        parameters = np.atleast_2d(parameters)
+        if not parameters.shape[1] == self._mean.size:
+            raise ValueError(f"Invalid parameter dimension {parameters.shape[1]}")
+
+        parameter_diffs = parameters - self._mean
+        log_probabilities = -0.5 * np.einsum(
+            "ni,ij,nj->n", parameter_diffs, self._precision, parameter_diffs
+        )
+        return log_probabilities
+
     def sample(self) -> np.ndarray:
         """Draw a sample from the prior."""
         standard_normal_increment = self._rng.normal(size=self._mean.size)
@@ -8,6 +8,7 @@ Classes:
     SamplerRunSettings: Settings for conduction of a run with an initialized MLDASampler.
     RNGStates: Collection of random number generators of different sub-components, for
         re-initialization of the sampler
+    StreamedChain: List-like container passing Markov chain samples on to a sink in batches.
     MTMLDASampler: Main object for thread-parallel MLDA sampling.
 """
 
@@ -61,8 +62,16 @@ class SamplerRunSettings:
             state is used to create the first node. Can be used for reinitialization.
             Default is None.
         num_threads (int): Number of threads to be used for parallel evaluation of posterior
-            evaluation requests. Default is 1.
+            evaluation requests. Requests for prefetched tree nodes are submitted asynchronously,
+            so that blocking calls to external model servers overlap with each other and with
+            the tree expansion. Values larger than one require models that can be called
+            concurrently. Default is 1.
         print_interval (int): Interval for printing run statistics, default is 1.
+        sample_sink (Callable[[np.ndarray], None]): Callable receiving batches of samples as they
+            are generated, e.g. for writing them to disk. If given, samples are not kept in
+            memory. Default is None.
+        sink_interval (int): Number of samples passed on to the sample sink at once,
+            default is 100.
     """
 
     num_samples: int
@@ -70,6 +79,8 @@ class SamplerRunSettings:
     initial_node: mltree.MTNode = None
     num_threads: int = 1
     print_interval: int = 1
+    sample_sink: Callable[[np.ndarray], None] = None
+    sink_interval: int = 100
 
 
 @dataclass
@@ -84,6 +95,55 @@ class RNGStates:
     node_init: np.random.Generator
 
 
+# ==================================================================================================
+class StreamedChain:
+    """List-like container passing Markov chain samples on to a sink in batches.
+
+    The container mimics the append and length interface of a list, so that it can be used as a
+    drop-in replacement for the chain list in the sampler. New samples are buffered, and passed on
+    to the sink as a two-dimensional array once the buffer is full. Afterwards, they are discarded
+    from memory. The length of the container is the total number of received samples.
+
+    Methods:
+        append: Add a sample to the chain
+        flush: Pass all buffered samples on to the sink
+    """
+
+    def __init__(self, sink: Callable[[np.ndarray], None], interval: int) -> None:
+        """Constructor.
+
+        Args:
+            sink (Callable[[np.ndarray], None]): Callable receiving batches of samples
+            interval (int): Number of samples to buffer before passing them on to the sink
+
+        Raises:
+            ValueError: Checks that the interval is positive
+        """
+        if interval < 1:
+            raise ValueError("Sink interval must be at least 1")
+        self._sink = sink
+        self._interval = interval
+        self._buffer = []
+        self._num_flushed_samples = 0
+
+    def append(self, sample: np.ndarray) -> None:
+        """Add a sample to the chain, flush the buffer if it is full."""
+        self._buffer.append(sample)
+        if len(self._buffer) >= self._interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Pass all buffered samples on to the sink."""
+        if self._buffer:
+            self._sink(np.array(self._buffer))
+            self._num_flushed_samples += len(self._buffer)
+            self._buffer.clear()
+
+    def __len__(self) -> int:
+        """Return the total number of samples in the chain."""
+        return self._num_flushed_samples + len(self._buffer)
+
+
 # ==================================================================================================
 class MTMLDASampler:
     """Main object for parallel MLDA sampling.
@@ -170,7 +230,9 @@ class MTMLDASampler:
         The method takes a data class with run-specific settings. As described in the constructor,
         it initiates a while loop that continuous until the desired number of fine level samples
         has been generated. This method is mainly an interface, most of the program logic is
-        implemented in the private sub-methods.
+        implemented in the private sub-methods. If a sample sink is provided in the run settings,
+        the chain is a `StreamedChain`, which only holds the number of generated samples after
+        the run.
 
         Args:
             run_settings (SamplerRunSettings): Settings for the sampler run.
@@ -183,7 +245,11 @@ class MTMLDASampler:
         self._print_interval = run_settings.print_interval
         num_threads = run_settings.num_threads
         mltree_root = self._init_mltree(run_settings.initial_state, run_settings.initial_node)
-        mcmc_chain = [run_settings.initial_state]
+        if run_settings.sample_sink is None:
+            mcmc_chain = []
+        else:
+            mcmc_chain = StreamedChain(run_settings.sample_sink, run_settings.sink_interval)
+        mcmc_chain.append(run_settings.initial_state)
 
         try:
             with ThreadPoolExecutor(max_workers=num_threads) as executor:
@@ -213,6 +279,8 @@ class MTMLDASampler:
             except RecursionError:
                 self._logger.exception()
         finally:
+            if isinstance(mcmc_chain, StreamedChain):
+                mcmc_chain.flush()
             return mcmc_chain, mltree_root
 
     # ----------------------------------------------------------------------------------------------
@@ -13,8 +13,11 @@ Classes:
     ParallelRunner: Runner class for parallel MTMLDA runs
 """
 
+import copy
 import multiprocessing
+import os
 from dataclasses import dataclass
+from multiprocessing.sharedctypes import Synchronized
 from pathlib import Path
 
 import numpy as np
@@ -30,16 +33,37 @@ class ParallelRunSettings:
     """Data class for parallel run settings, used for the `run.py` wrapper.
 
     Attributes:
-        num_chains (int): Number of parallel chains to run
+        num_chains (int): Number of chains to run. All chains are run in parallel, unless the
+            number of worker processes is limited, in which case the remaining chains are queued
         chain_save_path (Path): Path to save MCMC chain data, will be appended by process ID
         chain_load_path (Path): Path to load MCMC chain data, will be appended by process ID
         node_save_path (Path): Path to save node data, will be appended by process ID
         node_load_path (Path): Path to load node data, will be appended by process ID
         rng_state_save_path (Path): Path to save RNG state data, will be appended by process ID
         rng_state_load_path (Path): Path to load RNG state data, will be appended by process ID
+        evaluation_cache_save_path (Path): Path to save the evaluation caches of model components,
+            will be appended by process ID
+        evaluation_cache_load_path (Path): Path to load the evaluation caches of model components,
+            will be appended by process ID
         overwrite_chain (bool): Overwrite existing chain data
         overwrite_node (bool): Overwrite existing node data
         overwrite_rng_states (bool): Overwrite existing RNG state data
+        overwrite_evaluation_cache (bool): Overwrite existing evaluation cache data
+        stream_chain (bool): Stream samples to a binary file during sampling, instead of holding
+            the complete chain in memory. After sampling, the file is converted to npy format.
+            Default is False
+        threads_per_chain (int | None): Number of CPU cores assigned to each chain. If set, every
+            worker is pinned to its own set of CPUs, and the thread count of OpenMP and BLAS
+            libraries is requested accordingly. Useful for CPU-bound, in-process models. Default
+            is None, meaning that workers are neither pinned nor thread-limited
+        max_processes (int | None): Maximum number of worker processes, default is None, meaning
+            that one worker per chain is started. Limiting the number is useful for CPU-bound,
+            in-process models, whereas chains that mostly wait for remote model servers benefit
+            from running all at once
+        use_forkserver (bool): Start workers from a fork server instead of forking the main
+            process, default is False. This avoids deadlocks when forking a process with active
+            threads, but requires that the application builder can be imported by the workers,
+            i.e. it must not be defined in a main module without file (stdin, Jupyter)
     """
 
     num_chains: int
@@ -49,9 +73,16 @@ class ParallelRunSettings:
     node_load_path: Path = None
     rng_state_save_path: Path = None
     rng_state_load_path: Path = None
+    evaluation_cache_save_path: Path = None
+    evaluation_cache_load_path: Path = None
     overwrite_chain: bool = True
     overwrite_node: bool = True
     overwrite_rng_states: bool = True
+    overwrite_evaluation_cache: bool = True
+    stream_chain: bool = False
+    threads_per_chain: int | None = None
+    max_processes: int | None = None
+    use_forkserver: bool = False
 
 
 # ----------------------------------------------------------------------------------------------
@@ -105,14 +136,101 @@ class ParallelRunner:
 
     # ----------------------------------------------------------------------------------------------
     def run(self) -> None:
-        """Runs the function `_execute_mtmlda_on_procs` in a multiprocessing pool."""
+        """Runs the function `_execute_mtmlda_on_procs` in a multiprocessing pool.
+
+        Per default, one worker is started for every chain. The pool size can be limited
+        explicitly, and is further limited by the number of CPUs available to the main process,
+        divided by the number of CPUs assigned to each chain, if the latter is set. In this case,
+        every worker is pinned to its own set of these CPUs on startup. The thread count of OpenMP
+        and BLAS libraries is then requested via the respective environment variables, which are
+        set before the workers are started. This only affects libraries loaded after that point,
+        libraries already loaded in a forked main process keep their thread pools, which are
+        merely confined to the worker's CPUs.
+        Chains are handed out to the workers one at a time, so that workers that finish early pick
+        up the remaining chains instead of idling while slower chains are still running. The
+        runner itself is handed to the workers only once on startup, via a pool initializer, so
+        that only process IDs are communicated for the individual tasks.
+        Per default, workers are forked from the main process. Optionally, they are started from a
+        fork server, which avoids deadlocks when forking a process with active threads, e.g. from
+        BLAS libraries. Heavy modules are preloaded in the fork server once and inherited by all
+        workers. If the fork server is not available on the platform, workers are forked directly
+        from the main process.
+        """
         num_chains = self._parallel_run_settings.num_chains
+        threads_per_chain = self._parallel_run_settings.threads_per_chain
         if num_chains < 1:
             raise ValueError("Number of chains must be at least 1")
+        if threads_per_chain is not None and threads_per_chain < 1:
+            raise ValueError("Number of threads per chain must be at least 1")
+        if self._parallel_run_settings.stream_chain and (
+            self._parallel_run_settings.chain_save_path is None
+        ):
+            raise ValueError("Streaming the chain requires a chain save path")
         process_ids = range(num_chains)
+        available_cpus = _get_available_cpus()
+        num_processes = self._get_number_of_processes(available_cpus)
+
+        mp_context = self._get_multiprocessing_context()
+        # Thread limits have to be set before workers or the fork server are started
+        previous_values = _set_thread_variables(threads_per_chain)
+        worker_counter = mp_context.Value("i", 0)
+
+        try:
+            with mp_context.Pool(
+                processes=num_processes,
+                initializer=_init_worker,
+                initargs=(self, worker_counter, available_cpus, num_processes, threads_per_chain),
+            ) as process_pool:
+                for _ in process_pool.imap_unordered(
+                    _run_chain_in_worker, process_ids, chunksize=1
+                ):
+                    pass
+        finally:
+            _restore_thread_variables(previous_values)
+
+    # ----------------------------------------------------------------------------------------------
+    def _get_number_of_processes(self, available_cpus: list[int]) -> int:
+        """Determine the number of worker processes in the pool.
+
+        Args:
+            available_cpus (list[int]): CPUs available to the main process
+
+        Raises:
+            ValueError: Checks that the maximum number of processes is at least 1
+
+        Returns:
+            int: Number of worker processes
+        """
+        num_processes = self._parallel_run_settings.num_chains
+        max_processes = self._parallel_run_settings.max_processes
+        threads_per_chain = self._parallel_run_settings.threads_per_chain
+        if max_processes is not None:
+            if max_processes < 1:
+                raise ValueError("Maximum number of processes must be at least 1")
+            num_processes = min(num_processes, max_processes)
+        if threads_per_chain is not None:
+            num_processes = min(num_processes, max(1, len(available_cpus) // threads_per_chain))
+        return num_processes
+
+    # ----------------------------------------------------------------------------------------------
+    def _get_multiprocessing_context(self) -> multiprocessing.context.BaseContext:
+        """Get the multiprocessing context to start the pool workers with.
 
-        with multiprocessing.Pool(processes=num_chains) as process_pool:
-            process_pool.map(self._execute_mtmlda_on_procs, process_ids)
+        Returns:
+            multiprocessing.context.BaseContext: Fork server context if requested and available,
+                fork context otherwise
+        """
+        if self._parallel_run_settings.use_forkserver:
+            try:
+                mp_context = multiprocessing.get_context("forkserver")
+                mp_context.set_forkserver_preload(
+                    ["numpy", "scipy", "umbridge", "mtmlda.run.runner"]
+                )
+            except ValueError:
+                pass
+            else:
+                return mp_context
+        return multiprocessing.get_context("fork")
 
     # ----------------------------------------------------------------------------------------------
     def _execute_mtmlda_on_procs(self, process_id: int) -> None:
@@ -144,9 +262,42 @@ class ParallelRunner:
             ground_proposal,
         )
         self._adjust_initialization_settings(process_id, app_builder, mtmlda_sampler)
-        mcmc_chain, final_node = mtmlda_sampler.run(self._sampler_run_settings)
+        mcmc_chain, final_node = self._run_sampler(process_id, mtmlda_sampler)
         rng_states = mtmlda_sampler.get_rngs()
-        self._save_results(process_id, rng_states, mcmc_chain, final_node)
+        cache_entries = [
+            component.get_cache_entries() for component in app_builder.get_cached_components()
+        ]
+        self._save_results(process_id, rng_states, mcmc_chain, final_node, cache_entries)
+
+    # ----------------------------------------------------------------------------------------------
+    def _run_sampler(
+        self, process_id: int, mtmlda_sampler: sampling.MTMLDASampler
+    ) -> tuple[list[np.ndarray] | sampling.StreamedChain, mltree.MTNode]:
+        """Run the sampler, optionally streaming the generated samples to disk.
+
+        Args:
+            process_id (int): Id of the invoking process
+            mtmlda_sampler (sampling.MTMLDASampler): MTMLDA Sampler Object
+
+        Returns:
+            tuple[list[np.ndarray] | sampling.StreamedChain, mltree.MTNode]: Generated chain and
+                final node of the Markov tree
+        """
+        if not self._parallel_run_settings.stream_chain:
+            return mtmlda_sampler.run(self._sampler_run_settings)
+
+        with utils.open_chain_stream(
+            process_id,
+            self._parallel_run_settings.chain_save_path,
+            exist_ok=self._parallel_run_settings.overwrite_chain,
+        ) as chain_stream:
+
+            def write_samples(samples: np.ndarray) -> None:
+                chain_stream.write(np.ascontiguousarray(samples, dtype=np.float64).tobytes())
+                chain_stream.flush()
+
+            self._sampler_run_settings.sample_sink = write_samples
+            return mtmlda_sampler.run(self._sampler_run_settings)
 
     # ----------------------------------------------------------------------------------------------
     def _modify_process_dependent_settings(self, process_id: int) -> None:
@@ -213,8 +364,9 @@ class ParallelRunner:
 
         # Load iniital state from previous chain
         if self._parallel_run_settings.chain_load_path is not None:
-            chain = utils.load_chain(process_id, self._parallel_run_settings.chain_load_path)
-            initial_state = chain[-1, :]
+            initial_state = utils.load_chain(
+                process_id, self._parallel_run_settings.chain_load_path, only_last=True
+            )
         else:
             initial_state = app_builder.generate_initial_state(self._initial_state_settings)
         self._sampler_run_settings.initial_state = initial_state
@@ -222,6 +374,15 @@ class ParallelRunner:
         if self._parallel_run_settings.node_load_path is not None:
             initial_node = utils.load_pickle(process_id, self._parallel_run_settings.node_load_path)
             self._sampler_run_settings.initial_node = initial_node
+        # Fill evaluation caches of model components
+        if self._parallel_run_settings.evaluation_cache_load_path is not None:
+            cache_entries = utils.load_pickle(
+                process_id, self._parallel_run_settings.evaluation_cache_load_path
+            )
+            for component, component_entries in zip(
+                app_builder.get_cached_components(), cache_entries, strict=True
+            ):
+                component.set_cache_entries(component_entries)
 
     # ----------------------------------------------------------------------------------------------
     def _save_results(
@@ -230,6 +391,7 @@ class ParallelRunner:
         rng_states: sampling.RNGStates,
         mcmc_chain: np.ndarray,
         final_node: mltree.MTNode,
+        cache_entries: list[dict],
     ) -> None:
         """Save data from sampling to disk.
 
@@ -240,9 +402,11 @@ class ParallelRunner:
             process_id (int): Id of the invoking process in parallel runs
             rng_states (sampling.RNGStates): RNG states of the Sampler, save for initialization
                 to extend previously sampled chains
-            mcmc_chain (np.ndarray): Generated samples
+            mcmc_chain (np.ndarray): Generated samples, ignored if samples have been streamed
             final_node (mltree.MTNode): Last node in the utilized Markov tree, use to restart
                 sampling from this point
+            cache_entries (list[dict]): Entries of the evaluation caches of model components, use
+                to avoid re-evaluation of known parameter candidates in subsequent runs
         """
         if self._parallel_run_settings.rng_state_save_path is not None:
             utils.save_pickle(
@@ -251,7 +415,13 @@ class ParallelRunner:
                 rng_states,
                 exist_ok=self._parallel_run_settings.overwrite_rng_states,
             )
-        if self._parallel_run_settings.chain_save_path is not None:
+        if self._parallel_run_settings.stream_chain:
+            utils.convert_chain_stream(
+                process_id,
+                self._parallel_run_settings.chain_save_path,
+                self._sampler_run_settings.initial_state.size,
+            )
+        elif self._parallel_run_settings.chain_save_path is not None:
             utils.save_chain(
                 process_id,
                 self._parallel_run_settings.chain_save_path,
@@ -265,3 +435,107 @@ class ParallelRunner:
                 final_node,
                 exist_ok=self._parallel_run_settings.overwrite_node,
             )
+        if self._parallel_run_settings.evaluation_cache_save_path is not None:
+            utils.save_pickle(
+                process_id,
+                self._parallel_run_settings.evaluation_cache_save_path,
+                cache_entries,
+                exist_ok=self._parallel_run_settings.overwrite_evaluation_cache,
+            )
+
+
+# ==================================================================================================
+_RUNNER = None
+
+
+def _init_worker(
+    runner: ParallelRunner,
+    worker_counter: Synchronized,
+    available_cpus: list[int],
+    num_processes: int,
+    threads_per_chain: int | None,
+) -> None:
+    """Pool initializer, stores the runner in the global scope of the worker process.
+
+    If a number of CPUs per chain is given, the worker is pinned to its own set of CPUs in
+    addition, to avoid oversubscription of cores.
+    The set is determined by the index of the worker in the pool, which is drawn from a shared
+    counter. As a worker pins itself only once, all chains it executes run on the same CPUs.
+
+    Args:
+        runner (ParallelRunner): Runner object to execute chains with
+        worker_counter (Synchronized): Shared counter for the enumeration of pool workers
+        available_cpus (list[int]): CPUs available to the main process
+        num_processes (int): Number of workers in the pool
+        threads_per_chain (int | None): Number of CPUs assigned to each worker, no pinning if None
+    """
+    global _RUNNER  # noqa: PLW0603
+    _RUNNER = runner
+
+    if threads_per_chain is None or not hasattr(os, "sched_setaffinity"):
+        return
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value % num_processes
+        worker_counter.value += 1
+    first_cpu = worker_index * threads_per_chain
+    os.sched_setaffinity(0, available_cpus[first_cpu : first_cpu + threads_per_chain])
+
+
+# --------------------------------------------------------------------------------------------------
+def _run_chain_in_worker(process_id: int) -> None:
+    """Execute a single chain with the runner stored in the worker process.
+
+    Settings are modified in a process-dependent manner during execution. As a worker can execute
+    multiple chains in sequence, every chain is run on a fresh copy of the stored runner.
+
+    Args:
+        process_id (int): Id of the chain to run
+    """
+    runner = copy.deepcopy(_RUNNER)
+    runner._execute_mtmlda_on_procs(process_id)  # noqa: SLF001
+
+
+# --------------------------------------------------------------------------------------------------
+def _get_available_cpus() -> list[int]:
+    """Get the CPUs the main process may run on.
+
+    Returns:
+        list[int]: IDs of the available CPUs
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+# --------------------------------------------------------------------------------------------------
+def _set_thread_variables(threads_per_chain: int | None) -> dict[str, str | None]:
+    """Request the thread count of OpenMP and BLAS libraries via environment variables.
+
+    Args:
+        threads_per_chain (int | None): Number of threads per chain, variables are not touched if
+            None
+
+    Returns:
+        dict[str, str | None]: Previous values of the modified variables, None if unset
+    """
+    if threads_per_chain is None:
+        return {}
+    thread_variables = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+    previous_values = {variable: os.environ.get(variable) for variable in thread_variables}
+    for variable in thread_variables:
+        os.environ[variable] = str(threads_per_chain)
+    return previous_values
+
+
+# --------------------------------------------------------------------------------------------------
+def _restore_thread_variables(previous_values: dict[str, str | None]) -> None:
+    """Restore environment variables modified by `_set_thread_variables`.
+
+    Args:
+        previous_values (dict[str, str | None]): Previous values of the variables, None if unset
+    """
+    for variable, value in previous_values.items():
+        if value is None:
+            os.environ.pop(variable, None)
+        else:
+            os.environ[variable] = value
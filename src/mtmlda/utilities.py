@@ -9,6 +9,8 @@ Functions:
     append_string_to_path: Extend a Path object with a string for its name
     load_chain: Load MCMC chain data from npy file
     save_chain: Save MCMC chain array to npy file
+    open_chain_stream: Open a binary file for streaming MCMC samples to disk
+    convert_chain_stream: Convert a streamed MCMC chain from binary to npy file
     load_pickle: Load a pickled object into memory
     save_pickle: Save a generic object into pickle
     request_umbridge_server: Request UM-Bridge server with fail-save for long response times
@@ -19,7 +21,7 @@ import pickle
 import time
 from numbers import Real
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 import numpy as np
 import umbridge as ub
@@ -84,26 +86,33 @@ def get_specific_file_type(directory: Path, file_type: str) -> list[str]:
 
 
 # --------------------------------------------------------------------------------------------------
-def load_chain(process_id: int, load_path: Path) -> None:
+def load_chain(process_id: int, load_path: Path, *, only_last: bool = False) -> np.ndarray:
     """Load MCMC chain data from npy file.
 
     The provided file path is extended by the process ID via the `append_string_to_path` function.
     Clearly, this method only works if it is called by the exact same number of chains that have
-    been saved before.
+    been saved before. If only the last sample is requested, e.g. for re-initialization of a chain,
+    the file is memory-mapped and only that sample is read from disk.
 
     Args:
         process_id (int): ID of the calling process
         load_path (Path): Generic path to find chain files in
+        only_last (bool): Only load the last sample of the chain, default is False
 
     Raises:
         FileNotFoundError: Checks if the chain file exists
 
     Returns:
-        np.ndarray: MCMC chain
+        np.ndarray: MCMC chain, or its last sample
     """
     chain_file = append_string_to_path(load_path, f"{process_id}.npy")
     try:
-        chain = np.load(chain_file)
+        if only_last:
+            chain_map = np.load(chain_file, mmap_mode="r")
+            chain = np.array(chain_map[-1])
+            del chain_map
+        else:
+            chain = np.load(chain_file)
     except FileNotFoundError:
         raise FileNotFoundError(f"Chain file not found for process id {process_id}")
     return chain
@@ -115,7 +124,8 @@ def save_chain(
 ) -> None:
     """Save MCMC chain array to npy file.
 
-    The save path is process-specific through the `append_string_to_path` function.
+    The save path is process-specific through the `append_string_to_path` function. The chain is
+    stored as a plain numeric array, pickling of the data is explicitly prohibited.
 
     Args:
         process_id (int): ID of the calling process
@@ -125,7 +135,50 @@ def save_chain(
     """
     os.makedirs(save_path.parent, exist_ok=exist_ok)
     chain_file = append_string_to_path(save_path, f"{process_id}.npy")
-    np.save(chain_file, mcmc_trace)
+    np.save(chain_file, np.asarray(mcmc_trace), allow_pickle=False)
+
+
+# --------------------------------------------------------------------------------------------------
+def open_chain_stream(process_id: int, save_path: Path, exist_ok: bool) -> BinaryIO:
+    """Open a binary file for streaming MCMC samples to disk.
+
+    The save path is process-specific through the `append_string_to_path` function. Samples are
+    supposed to be written to the file as raw float64 data in C-order, as soon as they are
+    generated. This allows for monitoring of the chain during sampling, without holding the
+    complete chain in memory.
+
+    Args:
+        process_id (int): ID of the calling process
+        save_path (Path): Generic path to save chain files to
+        exist_ok (bool): Choose if existing file should be overwritten
+
+    Returns:
+        BinaryIO: Opened binary file
+    """
+    save_path.parent.mkdir(parents=True, exist_ok=exist_ok)
+    stream_file = append_string_to_path(save_path, f"{process_id}.bin")
+    return stream_file.open("wb")
+
+
+# --------------------------------------------------------------------------------------------------
+def convert_chain_stream(process_id: int, save_path: Path, dimension: int) -> None:
+    """Convert a streamed MCMC chain from binary to npy file.
+
+    The binary file is memory-mapped, so that the chain is never loaded into memory completely.
+    After conversion, the binary file is removed. The resulting npy file is equivalent to the one
+    written by `save_chain`.
+
+    Args:
+        process_id (int): ID of the calling process
+        save_path (Path): Generic path the chain has been streamed to
+        dimension (int): Dimension of the parameter space
+    """
+    stream_file = append_string_to_path(save_path, f"{process_id}.bin")
+    chain_file = append_string_to_path(save_path, f"{process_id}.npy")
+    chain_map = np.memmap(stream_file, dtype=np.float64, mode="r").reshape(-1, dimension)
+    np.save(chain_file, chain_map, allow_pickle=False)
+    del chain_map
+    stream_file.unlink()
 
 
 # --------------------------------------------------------------------------------------------------